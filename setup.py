@@ -14,6 +14,9 @@ setup(
         Extension(
             "rsatoolbox.cengine.similarity",
             ["src/rsatoolbox/cengine/similarity.pyx"],
-            include_dirs=[numpy.get_include()])],
+            include_dirs=[numpy.get_include()]),
+        Extension(
+            "rsatoolbox.cengine.transform",
+            ["src/rsatoolbox/cengine/transform.pyx"])],
     cmdclass={'build_ext': build_ext}
 )
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import cython
+from cython cimport floating
+from libc.math cimport sqrt, isnan, NAN
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cpdef void clip_sqrt(floating [:, ::1] x) noexcept nogil:
+    # sets negative values to 0 and takes the square root, in place
+    # NaN entries stay NaN
+    cdef:
+        Py_ssize_t i, j
+        floating v
+    for i in range(x.shape[0]):
+        for j in range(x.shape[1]):
+            v = x[i, j]
+            if v < 0:
+                v = 0
+            x[i, j] = sqrt(v)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cpdef void minmax(floating [:, ::1] x) noexcept nogil:
+    # scales each row of x to the range [0, 1], in place
+    # rows containing NaN become all NaN, as with numpy's min and max
+    # this divides rather than multiplying by the inverse range, such that
+    # the row maximum maps to exactly 1, which geodesic_transform relies on
+    cdef:
+        Py_ssize_t i, j
+        floating v, d_min, d_max, d_range
+        bint has_nan
+    for i in range(x.shape[0]):
+        if x.shape[1] == 0:
+            continue
+        d_min = x[i, 0]
+        d_max = x[i, 0]
+        has_nan = False
+        for j in range(x.shape[1]):
+            v = x[i, j]
+            if isnan(v):
+                has_nan = True
+                break
+            if v < d_min:
+                d_min = v
+            elif v > d_max:
+                d_max = v
+        if has_nan:
+            for j in range(x.shape[1]):
+                x[i, j] = NAN
+            continue
+        d_range = d_max - d_min
+        for j in range(x.shape[1]):
+            x[i, j] = (x[i, j] - d_min) / d_range
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cpdef void geotopological(floating [:, ::1] x, double low, double up) noexcept nogil:
+    # maps values below low to 0, above up to 1 and scales values
+    # in between linearly, in place. NaN entries stay NaN
+    cdef:
+        Py_ssize_t i, j
+        floating v
+        double scale = 1.0 / (up - low)
+    for i in range(x.shape[0]):
+        for j in range(x.shape[1]):
+            v = (x[i, j] - low) * scale
+            if v < 0:
+                v = 0
+            elif v > 1:
+                v = 1
+            x[i, j] = v
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cpdef void rank_average(
+        floating [:, ::1] x, Py_ssize_t [:, ::1] order,
+        double [:, ::1] out) noexcept nogil:
+    # writes the ranks of each row of x into out, assigning tied values
+    # the average of their ranks, like scipy's rankdata(method='average').
+    # order must be the row-wise argsort of x, which sorts NaN last.
+    # NaN entries are omitted from the ranking and get rank NaN
+    cdef:
+        Py_ssize_t i, j, k, start
+        double rank
+    for i in range(x.shape[0]):
+        start = 0
+        while start < x.shape[1] and not isnan(x[i, order[i, start]]):
+            j = start + 1
+            while j < x.shape[1] and x[i, order[i, j]] == x[i, order[i, start]]:
+                j += 1
+            # ranks start + 1 to j are tied
+            rank = (start + j + 1) / 2.0
+            for k in range(start, j):
+                out[i, order[i, k]] = rank
+            start = j
+        for j in range(start, x.shape[1]):
+            out[i, order[i, j]] = NAN
@@ -3,15 +3,25 @@
 """ transforms, which can be applied to RDMs
 """
 from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
 from copy import deepcopy
+from numbers import Number
 import numpy as np
-import networkx as nx
+from joblib import Parallel, delayed
 from scipy.stats import rankdata
 from scipy.spatial.distance import squareform
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import shortest_path
+from rsatoolbox.cengine.transform import (
+    clip_sqrt, minmax, geotopological, rank_average)
+from rsatoolbox.util.rdm_utils import batch_to_vectors
 from .rdms import RDMs
+if TYPE_CHECKING:
+    from numpy.typing import DTypeLike
 
 
-def rank_transform(rdms: RDMs, method: str = 'average') -> RDMs:
+def rank_transform(rdms: RDMs, method: str = 'average',
+                   inplace: bool = False) -> RDMs:
     """ applies a rank_transform and generates a new RDMs object
     This assigns a rank to each dissimilarity estimate in the RDM,
     deals with rank ties and saves ranks as new dissimilarity estimates.
@@ -24,43 +34,52 @@ def rank_transform(rdms: RDMs, method: str = 'average') -> RDMs:
         method(String):
             controls how ranks are assigned to equal values
             options are: ‘average’, ‘min’, ‘max’, ‘dense’, ‘ordinal’
+        inplace(bool): if True, ``rdms`` is changed and returned instead
+            of a new RDMs object, reusing its dissimilarities where possible
+            and skipping the descriptor copies. Defaults to False
 
     Returns:
         rdms_new(RDMs): RDMs object with rank transformed dissimilarities
 
     """
     dissimilarities = rdms.get_vectors()
-    cfg = dict(method=method, nan_policy='omit')
-    dissimilarities = np.array(
-        [rankdata(dissimilarities[i], **cfg) for i in range(rdms.n_rdm)]
-    )
+    if method == 'average':
+        dissimilarities = np.ascontiguousarray(
+            dissimilarities, dtype=np.float64)
+        ranks = np.empty(dissimilarities.shape)
+        rank_average(
+            dissimilarities, np.argsort(dissimilarities, axis=1), ranks)
+        dissimilarities = ranks
+    else:
+        dissimilarities = rankdata(
+            dissimilarities, method=method, nan_policy='omit', axis=1)
     measure = rdms.dissimilarity_measure or ''
     if '(ranks)' not in measure:
         measure = (measure + ' (ranks)').strip()
-    return RDMs(
-        dissimilarities,
-        dissimilarity_measure=measure,
-        descriptors=deepcopy(rdms.descriptors),
-        rdm_descriptors=deepcopy(rdms.rdm_descriptors),
-        pattern_descriptors=deepcopy(rdms.pattern_descriptors)
-    )
+    return _transformed(rdms, dissimilarities, measure, inplace)
 
 
-def sqrt_transform(rdms: RDMs) -> RDMs:
+def sqrt_transform(rdms: RDMs, dtype: Optional[DTypeLike] = None,
+                   inplace: bool = False) -> RDMs:
     """ applies a square root transform and generates a new RDMs object
     This sets values blow 0 to 0 and takes a square root of each entry.
     It also adds a sqrt to the dissimilarity_measure entry.
 
     Args:
         rdms(RDMs): RDMs object
+        dtype(numpy.dtype): floating point type of the computation and of
+            the returned dissimilarities, e.g. ``np.float32``.
+            Defaults to the type of ``rdms``
+        inplace(bool): if True, ``rdms`` is changed and returned instead
+            of a new RDMs object, reusing its dissimilarities where possible
+            and skipping the descriptor copies. Defaults to False
 
     Returns:
         rdms_new(RDMs): RDMs object with sqrt transformed dissimilarities
 
     """
-    dissimilarities = rdms.get_vectors()
-    dissimilarities[dissimilarities < 0] = 0
-    dissimilarities = np.sqrt(dissimilarities)
+    dissimilarities = _vectors(rdms, dtype, inplace)
+    clip_sqrt(dissimilarities)
     if rdms.dissimilarity_measure is None:
         dissimilarity_measure = 'sqrt of unknown measure'
     elif rdms.dissimilarity_measure == 'squared euclidean':
@@ -69,87 +88,93 @@ def sqrt_transform(rdms: RDMs) -> RDMs:
         dissimilarity_measure = 'mahalanobis'
     else:
         dissimilarity_measure = 'sqrt of' + rdms.dissimilarity_measure
-    rdms_new = RDMs(dissimilarities,
-                    dissimilarity_measure=dissimilarity_measure,
-                    descriptors=deepcopy(rdms.descriptors),
-                    rdm_descriptors=deepcopy(rdms.rdm_descriptors),
-                    pattern_descriptors=deepcopy(rdms.pattern_descriptors))
-    return rdms_new
+    return _transformed(rdms, dissimilarities, dissimilarity_measure, inplace)
 
 
-def positive_transform(rdms: RDMs) -> RDMs:
+def positive_transform(rdms: RDMs, dtype: Optional[DTypeLike] = None,
+                       inplace: bool = False) -> RDMs:
     """ sets all negative entries in an RDM to zero and returns a new RDMs
 
     Args:
         rdms(RDMs): RDMs object
+        dtype(numpy.dtype): floating point type of the computation and of
+            the returned dissimilarities, e.g. ``np.float32``.
+            Defaults to the type of ``rdms``
+        inplace(bool): if True, ``rdms`` is changed and returned instead
+            of a new RDMs object, reusing its dissimilarities where possible
+            and skipping the descriptor copies. Defaults to False
 
     Returns:
         rdms_new(RDMs): RDMs object with sqrt transformed dissimilarities
 
     """
-    dissimilarities = rdms.get_vectors()
-    dissimilarities[dissimilarities < 0] = 0
-    rdms_new = RDMs(dissimilarities,
-                    dissimilarity_measure=rdms.dissimilarity_measure,
-                    descriptors=deepcopy(rdms.descriptors),
-                    rdm_descriptors=deepcopy(rdms.rdm_descriptors),
-                    pattern_descriptors=deepcopy(rdms.pattern_descriptors))
-    return rdms_new
+    dissimilarities = _vectors(rdms, dtype, inplace)
+    np.clip(dissimilarities, 0, None, out=dissimilarities)
+    return _transformed(rdms, dissimilarities, rdms.dissimilarity_measure, inplace)
 
 
-def transform(rdms: RDMs, fun) -> RDMs:
+def transform(rdms: RDMs, fun, inplace: bool = False) -> RDMs:
     """ applies an arbitray function ``fun`` to the dissimilarities and
     returns a new RDMs object.
 
+    With ``inplace=True``, NumPy ufuncs which keep the type of the
+    dissimilarities, e.g. ``np.log1p``, write directly into the
+    dissimilarities of ``rdms``.
+
     Args:
         rdms(RDMs): RDMs object
+        fun(callable): function applied to the 2D array of
+            vectorized RDMs
+        inplace(bool): if True, ``rdms`` is changed and returned instead
+            of a new RDMs object, reusing its dissimilarities where possible
+            and skipping the descriptor copies. Defaults to False
 
     Returns:
         rdms_new(RDMs): RDMs object with sqrt transformed dissimilarities
 
     """
     dissimilarities = rdms.get_vectors()
-    dissimilarities = fun(dissimilarities)
+    if inplace and _is_inplace_ufunc(fun, dissimilarities.dtype):
+        dissimilarities = np.require(dissimilarities, requirements='W')
+        fun(dissimilarities, out=dissimilarities)
+    else:
+        dissimilarities = fun(dissimilarities)
     if rdms.dissimilarity_measure is None:
         meas = 'transformed unknown measure'
     else:
         meas = 'transformed ' + rdms.dissimilarity_measure
-    rdms_new = RDMs(dissimilarities,
-                    dissimilarity_measure=meas,
-                    descriptors=deepcopy(rdms.descriptors),
-                    rdm_descriptors=deepcopy(rdms.rdm_descriptors),
-                    pattern_descriptors=deepcopy(rdms.pattern_descriptors))
-    return rdms_new
+    return _transformed(rdms, dissimilarities, meas, inplace)
 
 
-def minmax_transform(rdms: RDMs) -> RDMs:
+def minmax_transform(rdms: RDMs, dtype: Optional[DTypeLike] = None,
+                     inplace: bool = False) -> RDMs:
     '''applies a minmax transform to the dissimilarities and returns a new
     RDMs object.
 
     Args:
         rdms(RDMs): RDMs object
+        dtype(numpy.dtype): floating point type of the computation and of
+            the returned dissimilarities, e.g. ``np.float32``.
+            Defaults to the type of ``rdms``
+        inplace(bool): if True, ``rdms`` is changed and returned instead
+            of a new RDMs object, reusing its dissimilarities where possible
+            and skipping the descriptor copies. Defaults to False
 
     Returns:
         rdms_new(RDMs): RDMs object with minmax transformed dissimilarities
     '''
-    dissimilarities = rdms.get_vectors()
-    for i in range(rdms.n_rdm):
-        d_max = dissimilarities[i].max()
-        d_min = dissimilarities[i].min()
-        dissimilarities[i] = (dissimilarities[i] - d_min) / (d_max - d_min)
+    dissimilarities = _vectors(rdms, dtype, inplace)
+    minmax(dissimilarities)
     if rdms.dissimilarity_measure is None:
         meas = 'minmax transformed unknown measure'
     else:
         meas = 'minmax transformed ' + rdms.dissimilarity_measure
-    rdms_new = RDMs(dissimilarities,
-                    dissimilarity_measure=meas,
-                    descriptors=deepcopy(rdms.descriptors),
-                    rdm_descriptors=deepcopy(rdms.rdm_descriptors),
-                    pattern_descriptors=deepcopy(rdms.pattern_descriptors))
-    return rdms_new
+    return _transformed(rdms, dissimilarities, meas, inplace)
 
 
-def geotopological_transform(rdms: RDMs, low: float, up: float) -> RDMs:
+def geotopological_transform(rdms: RDMs, low: float, up: float,
+                             dtype: Optional[DTypeLike] = None,
+                             inplace: bool = False) -> RDMs:
     '''applies a geo-topological transform to the dissimilarities and returns
     a new RDMs object.
 
@@ -160,31 +185,28 @@ def geotopological_transform(rdms: RDMs, low: float, up: float) -> RDMs:
         rdms(RDMs): RDMs object
         low(float): lower quantile
         up(float): upper quantile
+        dtype(numpy.dtype): floating point type of the computation and of
+            the returned dissimilarities, e.g. ``np.float32``.
+            Defaults to the type of ``rdms``
+        inplace(bool): if True, ``rdms`` is changed and returned instead
+            of a new RDMs object, reusing its dissimilarities where possible
+            and skipping the descriptor copies. Defaults to False
 
     Returns:
         rdms_new(RDMs): RDMs object with geotopological transformed dissimilarities
     '''
-    dissimilarities = rdms.get_vectors()
-    gt_min = np.quantile(dissimilarities, low)
-    gt_max = np.quantile(dissimilarities, up)
-    dissimilarities[dissimilarities < gt_min] = 0
-    dissimilarities[(dissimilarities >= gt_min) & (dissimilarities <= gt_max)] = (
-        dissimilarities[(dissimilarities >= gt_min) & (dissimilarities <= gt_max)] - gt_min
-    ) / (gt_max - gt_min)
-    dissimilarities[dissimilarities > gt_max] = 1
+    dissimilarities = _vectors(rdms, dtype, inplace)
+    gt_min, gt_max = np.quantile(dissimilarities, [low, up])
+    geotopological(dissimilarities, gt_min, gt_max)
     if rdms.dissimilarity_measure is None:
         meas = 'geo-topological transformed unknown measure'
     else:
         meas = 'geo-topological transformed ' + rdms.dissimilarity_measure
-    rdms_new = RDMs(dissimilarities,
-                    dissimilarity_measure=meas,
-                    descriptors=deepcopy(rdms.descriptors),
-                    rdm_descriptors=deepcopy(rdms.rdm_descriptors),
-                    pattern_descriptors=deepcopy(rdms.pattern_descriptors))
-    return rdms_new
+    return _transformed(rdms, dissimilarities, meas, inplace)
 
 
-def geodesic_transform(rdms: RDMs) -> RDMs:
+def geodesic_transform(rdms: RDMs, n_jobs: int = 1,
+                       inplace: bool = False) -> RDMs:
     '''applies a geodesic transform to the dissimilarities and returns a
     new RDMs object.
 
@@ -193,26 +215,125 @@ def geodesic_transform(rdms: RDMs) -> RDMs:
 
     Args:
         rdms(RDMs): RDMs object
+        n_jobs(int): number of threads to process the RDMs in parallel,
+            -1 uses all available cores. Defaults to 1.
+        inplace(bool): if True, ``rdms`` is changed and returned instead
+            of a new RDMs object, reusing its dissimilarities where possible
+            and skipping the descriptor copies. Defaults to False
 
     Returns:
         rdms_new(RDMs): RDMs object with geodesic transformed dissimilarities
     '''
-    dissimilarities = minmax_transform(rdms).get_vectors()
-    for i in range(rdms.n_rdm):
-        G = nx.from_numpy_array(squareform(dissimilarities[i]))
-        long_edges = []
-        long_edges = list(
-            filter(lambda e: e[2] == 1, (e for e in G.edges.data("weight"))))
-        le_ids = list(e[:2] for e in long_edges)
-        G.remove_edges_from(le_ids)
-        dissimilarities[i] = squareform(np.array(nx.floyd_warshall_numpy(G)))
+    dissimilarities = _vectors(rdms, inplace=inplace)
+    minmax(dissimilarities)
+    rows, cols = np.triu_indices(rdms.n_cond, 1)
+    dissimilarities = np.array(Parallel(n_jobs=n_jobs, prefer='threads')(
+        delayed(_geodesic_one)(dissimilarities[i], rows, cols, rdms.n_cond)
+        for i in range(rdms.n_rdm)))
     if rdms.dissimilarity_measure is None:
         meas = 'geodesic transformed unknown measure'
     else:
         meas = 'geodesic transformed ' + rdms.dissimilarity_measure
-    rdms_new = RDMs(dissimilarities,
-                    dissimilarity_measure=meas,
-                    descriptors=deepcopy(rdms.descriptors),
-                    rdm_descriptors=deepcopy(rdms.rdm_descriptors),
-                    pattern_descriptors=deepcopy(rdms.pattern_descriptors))
-    return rdms_new
+    return _transformed(rdms, dissimilarities, meas, inplace)
+
+
+def _transformed(rdms: RDMs, dissimilarities: np.ndarray,
+                 dissimilarity_measure: Optional[str],
+                 inplace: bool) -> RDMs:
+    """ returns the transformed RDMs, which is either rdms itself with its
+    dissimilarities and measure replaced or a new RDMs object with copies
+    of the descriptors of rdms
+    """
+    if inplace:
+        rdms.dissimilarities, rdms.n_rdm, rdms.n_cond = \
+            batch_to_vectors(dissimilarities)
+        rdms.dissimilarity_measure = dissimilarity_measure
+        return rdms
+    return RDMs(dissimilarities,
+                dissimilarity_measure=dissimilarity_measure,
+                descriptors=_copy_descriptors(rdms.descriptors),
+                rdm_descriptors=_copy_descriptors(rdms.rdm_descriptors),
+                pattern_descriptors=_copy_descriptors(rdms.pattern_descriptors))
+
+
+def _is_inplace_ufunc(fun, dtype: np.dtype) -> bool:
+    """ whether fun is a unary numpy ufunc, which returns arrays of dtype
+    when applied to arrays of dtype, such that it can write into its input
+    """
+    if not isinstance(fun, np.ufunc) or fun.nin != 1 or fun.nout != 1:
+        return False
+    try:
+        return fun(np.empty(0, dtype=dtype)).dtype == dtype
+    except TypeError:
+        return False
+
+
+def _copy_descriptors(descriptors: dict) -> dict:
+    """ copies a descriptor dictionary without a full deepcopy
+
+    Immutable scalars are shared, and arrays and lists holding only such
+    scalars get a shallow copy. All other values, including lists and
+    object arrays with mutable elements, are deep-copied.
+    """
+    copied = {}
+    for key, value in descriptors.items():
+        if _is_immutable_scalar(value):
+            copied[key] = value
+        elif isinstance(value, np.ndarray) and (
+                value.dtype != object
+                or all(_is_immutable_scalar(v) for v in value.flat)):
+            copied[key] = value.copy()
+        elif isinstance(value, list) \
+                and all(_is_immutable_scalar(v) for v in value):
+            copied[key] = list(value)
+        else:
+            copied[key] = deepcopy(value)
+    return copied
+
+
+def _is_immutable_scalar(value) -> bool:
+    """ whether value can be shared between copies of a descriptor """
+    return isinstance(value, (str, bytes, Number, np.generic)) \
+        or value is None
+
+
+def _vectors(rdms: RDMs, dtype: Optional[DTypeLike] = None,
+             inplace: bool = False) -> np.ndarray:
+    """ returns the dissimilarity vectors as a writable C-contiguous float32
+    or float64 array, which can be passed to the compiled kernels in
+    rsatoolbox.cengine.transform
+
+    This is a copy unless inplace is True, in which case the dissimilarities
+    of rdms are returned directly if they already fulfill these requirements.
+    If no dtype is given, float32 and float64 RDMs keep their type and
+    everything else is converted to float64.
+    """
+    dissimilarities = rdms.get_vectors()
+    if dtype is None:
+        if dissimilarities.dtype in (np.float32, np.float64):
+            dtype = dissimilarities.dtype
+        else:
+            dtype = np.float64
+    elif np.dtype(dtype) not in (np.float32, np.float64):
+        raise ValueError(f'dtype must be float32 or float64, got {dtype}')
+    if inplace:
+        return np.require(dissimilarities, dtype=dtype, requirements='CW')
+    return np.array(dissimilarities, dtype=dtype, order='C')
+
+
+def _geodesic_one(dissimilarity: np.ndarray, rows: np.ndarray,
+                  cols: np.ndarray, n_cond: int) -> np.ndarray:
+    """ geodesic distances for a single minmax transformed RDM vector,
+    treating zero and the longest edges (value 1) as absent
+
+    rows and cols are the upper triangle indices of the RDM vector entries,
+    which are shared between all RDMs. Only the upper triangle of the graph
+    is built, as shortest_path symmetrises it with directed=False.
+    """
+    edges = (dissimilarity > 0) & (dissimilarity < 1)
+    graph = csr_matrix(
+        (dissimilarity[edges], (rows[edges], cols[edges])),
+        shape=(n_cond, n_cond))
+    return squareform(shortest_path(
+        graph, method='D', directed=False),
+        checks=False)
@@ -145,6 +145,53 @@ class TestCalc(unittest.TestCase):
         assert_almost_equal(rdms.dissimilarities, 4)
 
 
+class TestTransform(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.dis = self.rng.random((4, 45)) - 0.2
+        self.dis[1, 3] = np.nan
+
+    def test_clip_sqrt(self):
+        from rsatoolbox.cengine.transform import clip_sqrt
+        for dtype in [np.float64, np.float32]:
+            x = self.dis.astype(dtype)
+            clip_sqrt(x)
+            np.testing.assert_allclose(
+                x, np.sqrt(np.maximum(self.dis, 0)), rtol=1e-6)
+
+    def test_minmax(self):
+        from rsatoolbox.cengine.transform import minmax
+        for dtype in [np.float64, np.float32]:
+            x = self.dis.astype(dtype)
+            minmax(x)
+            d_min = self.dis.min(axis=1, keepdims=True)
+            d_max = self.dis.max(axis=1, keepdims=True)
+            np.testing.assert_allclose(
+                x, (self.dis - d_min) / (d_max - d_min), rtol=1e-5)
+
+    def test_geotopological(self):
+        from rsatoolbox.cengine.transform import geotopological
+        for dtype in [np.float64, np.float32]:
+            x = self.dis.astype(dtype)
+            geotopological(x, 0.2, 0.6)
+            np.testing.assert_allclose(
+                x, np.clip((self.dis - 0.2) / 0.4, 0, 1), rtol=1e-5)
+
+    def test_rank_average(self):
+        from scipy.stats import rankdata
+        from rsatoolbox.cengine.transform import rank_average
+        dis = self.rng.integers(0, 10, (4, 45)).astype(np.float64)
+        dis[self.rng.random(dis.shape) < 0.1] = np.nan
+        for dtype in [np.float64, np.float32]:
+            x = dis.astype(dtype)
+            ranks = np.empty(x.shape)
+            rank_average(x, np.argsort(x, axis=1), ranks)
+            np.testing.assert_array_equal(
+                ranks,
+                rankdata(dis, method='average', nan_policy='omit', axis=1))
+
+
 # Original Python version used as reference implementation:
 def similarity(vec_i, vec_j, method, noise=None,
                prior_lambda=1, prior_weight=0.1):
@@ -8,7 +8,7 @@ Test for RDM class
 
 import unittest
 import numpy as np
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_array_equal, assert_array_almost_equal
 from scipy.spatial.distance import squareform
 import rsatoolbox.rdm as rsr
 import rsatoolbox as rsa
@@ -233,6 +233,19 @@ class TestRDM(unittest.TestCase):
         self.assertEqual(transformed_rdm.n_rdm, rdms.n_rdm)
         self.assertEqual(transformed_rdm.n_cond, rdms.n_cond)
 
+    def test_transform_ufunc(self):
+        from rsatoolbox.rdm import transform
+        dis = self.rng.random((8, 10))
+        rdms = rsr.RDMs(dissimilarities=dis.copy())
+        assert_array_almost_equal(
+            transform(rdms, np.log1p).dissimilarities, np.log1p(dis))
+        assert_array_equal(rdms.dissimilarities, dis)
+        assert_array_equal(
+            transform(rdms, np.isnan).dissimilarities, np.isnan(dis))
+        rdms_int = rsr.RDMs(dissimilarities=np.array([[1, 4, 9]]))
+        assert_array_almost_equal(
+            transform(rdms_int, np.sqrt).dissimilarities, [[1, 2, 3]])
+
     def test_rank_transform(self):
         from rsatoolbox.rdm.transform import rank_transform
         from rsatoolbox.rdm.rdms import RDMs
@@ -244,6 +257,55 @@ class TestRDM(unittest.TestCase):
         self.assertEqual(rank_rdm.dissimilarity_measure, 'Euclidean (ranks)')
         assert_array_equal(rank_rdm.dissimilarities, [[2, 1, 3, np.nan]])
 
+    def test_rank_transform_multiple_rdms(self):
+        from rsatoolbox.rdm.transform import rank_transform
+        from rsatoolbox.rdm.rdms import RDMs
+        rdms = RDMs(
+            dissimilarities=np.array([[8, 6, 10, np.nan], [1, 1, 2, 3]]),
+        )
+        rank_rdm = rank_transform(rdms)
+        assert_array_equal(
+            rank_rdm.dissimilarities,
+            [[2, 1, 3, np.nan], [1.5, 1.5, 3, 4]])
+        rank_rdm = rank_transform(rdms, method='min')
+        assert_array_equal(
+            rank_rdm.dissimilarities,
+            [[2, 1, 3, np.nan], [1, 1, 3, 4]])
+
+    def test_transform_copies_descriptors(self):
+        from rsatoolbox.rdm import positive_transform
+        rdms = rsr.RDMs(
+            dissimilarities=np.zeros((2, 3)),
+            descriptors={'subj': 0, 'info': {'a': [1]}},
+            rdm_descriptors={'session': np.array([0, 1])},
+            pattern_descriptors={'type': ['a', 'b', 'c']})
+        pos_rdm = positive_transform(rdms)
+        self.assertEqual(pos_rdm, rdms)
+        pos_rdm.descriptors['info']['a'].append(2)
+        pos_rdm.rdm_descriptors['session'][0] = 5
+        pos_rdm.pattern_descriptors['type'][0] = 'd'
+        self.assertEqual(rdms.descriptors['info'], {'a': [1]})
+        assert_array_equal(rdms.rdm_descriptors['session'], [0, 1])
+        self.assertEqual(rdms.pattern_descriptors['type'], ['a', 'b', 'c'])
+
+    def test_transform_copies_nested_descriptors(self):
+        from rsatoolbox.rdm import positive_transform
+        objects = np.empty(2, dtype=object)
+        objects[0], objects[1] = [1], [2]
+        rdms = rsr.RDMs(
+            dissimilarities=np.zeros((2, 3)),
+            rdm_descriptors={
+                'arrays': [np.array([0, 1]), np.array([2, 3])],
+                'objects': objects},
+            pattern_descriptors={'info': [{'a': 1}, {'a': 2}, {'a': 3}]})
+        pos_rdm = positive_transform(rdms)
+        pos_rdm.rdm_descriptors['arrays'][0][0] = 5
+        pos_rdm.rdm_descriptors['objects'][0].append(5)
+        pos_rdm.pattern_descriptors['info'][0]['a'] = 5
+        assert_array_equal(rdms.rdm_descriptors['arrays'][0], [0, 1])
+        self.assertEqual(rdms.rdm_descriptors['objects'][0], [1])
+        self.assertEqual(rdms.pattern_descriptors['info'][0], {'a': 1})
+
     def test_rank_transform_unknown_measure(self):
         from rsatoolbox.rdm import rank_transform
         rdms = rsr.RDMs(dissimilarities=np.zeros((8, 10)))
@@ -266,6 +328,13 @@ class TestRDM(unittest.TestCase):
         self.assertEqual(sqrt_rdm.n_rdm, rdms.n_rdm)
         self.assertEqual(sqrt_rdm.n_cond, rdms.n_cond)
 
+    def test_sqrt_transform_values(self):
+        from rsatoolbox.rdm import sqrt_transform
+        rdms = rsr.RDMs(dissimilarities=np.array([[-1., 0., 4.]]))
+        sqrt_rdm = sqrt_transform(rdms)
+        assert_array_equal(sqrt_rdm.dissimilarities, [[0, 0, 2]])
+        assert_array_equal(rdms.dissimilarities, [[-1, 0, 4]])
+
     def test_positive_transform(self):
         from rsatoolbox.rdm import positive_transform
         dis = self.rng.random((8, 10)) - 0.5
@@ -282,6 +351,7 @@ class TestRDM(unittest.TestCase):
         self.assertEqual(pos_rdm.n_rdm, rdms.n_rdm)
         self.assertEqual(pos_rdm.n_cond, rdms.n_cond)
         assert np.all(pos_rdm.dissimilarities >= 0)
+        assert np.any(rdms.dissimilarities < 0)
 
     def test_minmax_transform(self):
         from rsatoolbox.rdm import minmax_transform
@@ -299,6 +369,63 @@ class TestRDM(unittest.TestCase):
         self.assertEqual(mm_rdm.n_rdm, rdms.n_rdm)
         self.assertEqual(mm_rdm.n_cond, rdms.n_cond)
 
+    def test_transform_dtype(self):
+        from rsatoolbox.rdm import (
+            sqrt_transform, positive_transform, minmax_transform,
+            geotopological_transform)
+        dis = self.rng.random((3, 10))
+        rdms = rsr.RDMs(dissimilarities=dis)
+        rdms32 = rsr.RDMs(dissimilarities=dis.astype(np.float32))
+        for fun in [sqrt_transform, positive_transform, minmax_transform]:
+            self.assertEqual(fun(rdms).dissimilarities.dtype, np.float64)
+            self.assertEqual(fun(rdms32).dissimilarities.dtype, np.float32)
+            rdm32 = fun(rdms, dtype=np.float32)
+            self.assertEqual(rdm32.dissimilarities.dtype, np.float32)
+            assert_array_almost_equal(
+                rdm32.dissimilarities, fun(rdms).dissimilarities, decimal=5)
+        gt_rdm = geotopological_transform(rdms, 0.2, 0.8, dtype=np.float32)
+        self.assertEqual(gt_rdm.dissimilarities.dtype, np.float32)
+        with self.assertRaises(ValueError):
+            sqrt_transform(rdms, dtype=np.int64)
+
+    def test_transform_inplace(self):
+        from rsatoolbox.rdm import (
+            rank_transform, sqrt_transform, positive_transform, transform,
+            minmax_transform, geotopological_transform, geodesic_transform)
+        dis = self.rng.random((3, 10)) - 0.2
+        funs = [
+            rank_transform, sqrt_transform, positive_transform,
+            minmax_transform, geodesic_transform,
+            lambda rdms, **kw: geotopological_transform(rdms, 0.2, 0.8, **kw),
+            lambda rdms, **kw: transform(rdms, np.exp, **kw),
+            lambda rdms, **kw: transform(rdms, np.isnan, **kw)]
+        for fun in funs:
+            rdms = rsr.RDMs(
+                dissimilarities=dis.copy(), dissimilarity_measure='Euclidean',
+                rdm_descriptors={'session': np.arange(3)})
+            expected = fun(rdms)
+            buffer = rdms.dissimilarities
+            result = fun(rdms, inplace=True)
+            self.assertIs(result, rdms)
+            self.assertEqual(result, expected)
+            if result.dissimilarities.dtype == dis.dtype \
+                    and fun is not rank_transform \
+                    and fun is not geodesic_transform:
+                self.assertIs(result.dissimilarities, buffer)
+        rdms = rsr.RDMs(dissimilarities=dis.copy())
+        sqrt_transform(positive_transform(rdms, inplace=True), inplace=True)
+        assert_array_almost_equal(
+            rdms.dissimilarities, np.sqrt(np.maximum(dis, 0)))
+
+    def test_minmax_transform_values(self):
+        from rsatoolbox.rdm import minmax_transform
+        dis = np.array([[1., 2., 5.], [-2., 0., 2.]])
+        mm_rdm = minmax_transform(rsr.RDMs(dissimilarities=dis))
+        assert_array_almost_equal(
+            mm_rdm.dissimilarities, [[0, 0.25, 1], [0, 0.5, 1]])
+        mm_rdm = minmax_transform(rsr.RDMs(np.array([[0., 49., 10.]])))
+        self.assertEqual(mm_rdm.dissimilarities.max(), 1)
+
     def test_geotopological_transform(self):
         from rsatoolbox.rdm import geotopological_transform
         dis = np.zeros((8, 10))
@@ -315,6 +442,28 @@ class TestRDM(unittest.TestCase):
         self.assertEqual(gt_rdm.n_rdm, rdms.n_rdm)
         self.assertEqual(gt_rdm.n_cond, rdms.n_cond)
 
+    def test_geotopological_transform_values(self):
+        from rsatoolbox.rdm import geotopological_transform
+        dis = np.array([[0., 1., 2., 3., 4., 5.], [6., 7., 8., 9., 10., 11.]])
+        rdms = rsr.RDMs(dissimilarities=dis)
+        gt_rdm = geotopological_transform(rdms, low=0.2, up=0.8)
+        gt_min, gt_max = np.quantile(dis, 0.2), np.quantile(dis, 0.8)
+        expected = (dis - gt_min) / (gt_max - gt_min)
+        expected[dis < gt_min] = 0
+        expected[dis > gt_max] = 1
+        assert_array_almost_equal(gt_rdm.dissimilarities, expected)
+        assert_array_equal(rdms.dissimilarities, dis)
+
+    def test_geotopological_transform_rescales_once(self):
+        # each value is mapped once, i.e. values set to 0 are not rescaled
+        # and rescaled values above gt_max are not set to 1 afterwards
+        from rsatoolbox.rdm import geotopological_transform
+        rdms = rsr.RDMs(dissimilarities=np.array(
+            [[-0.2, 0., 0.2, 0.4, 0.6, 0.8]]))
+        gt_rdm = geotopological_transform(rdms, low=0.2, up=0.8)
+        assert_array_almost_equal(
+            gt_rdm.dissimilarities, [[0, 0, 1 / 3, 2 / 3, 1, 1]])
+
     def test_geodesic_transform(self):
         from rsatoolbox.rdm import geodesic_transform
         dis = np.random.rand(8, 10)
@@ -331,6 +480,19 @@ class TestRDM(unittest.TestCase):
         self.assertEqual(gd_rdm.n_rdm, rdms.n_rdm)
         self.assertEqual(gd_rdm.n_cond, rdms.n_cond)
 
+    def test_geodesic_transform_values(self):
+        from rsatoolbox.rdm import geodesic_transform
+        rdms = rsr.RDMs(dissimilarities=np.array([
+            [1., 2., 5., 2., 3., 3.],
+            [3., 3., 2., 5., 2., 1.]]))
+        gd_rdm = geodesic_transform(rdms)
+        assert_array_almost_equal(
+            gd_rdm.dissimilarities,
+            [[0.5, 0.25, 0.75, 0.25, 0.5, 0.5],
+             [0.5, 0.5, 0.25, 1., 0.25, 0.75]])
+        gd_rdm_par = geodesic_transform(rdms, n_jobs=2)
+        assert_array_equal(gd_rdm_par.dissimilarities, gd_rdm.dissimilarities)
+
     def test_rdm_append(self):
         dis = np.zeros((8, 10))
         mes = "Euclidean"